@@ -3,22 +3,55 @@ AstrBot Zerochan 图片搜索插件
 基于 Zerochan API 搜索并获取动漫图片
 """
 
+import asyncio
 import aiohttp
 import json
 import re
-import random
-from typing import Optional, List, Dict, Any
+import sys
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, Tuple, Mapping, Union, Iterator
+from yarl import URL
 from astrbot.api.event import filter, AstrMessageEvent
 from astrbot.api.star import Context, Star, register
-from astrbot.api import logger
+from astrbot.api import logger, AstrBotConfig
 from astrbot.api.message_components import Image, Plain
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库
+    _json_loads = json.loads
+
 
 ZEROCHAN_API_BASE = "https://www.zerochan.net"
 USER_AGENT = "AstrBot-Zerochan-Plugin"
+# 单次搜索最多尝试的标签变体总数 (每个变体至多再跟随一次重定向)，避免占用过多的 60 次/分钟 配额；
+# 同时进行中的请求数由 MAX_CONCURRENT_PROBES 限制
+MAX_TAG_VARIANTS = 10
+# 同时进行中的标签请求数上限
+MAX_CONCURRENT_PROBES = 4
+# 单个响应体的最大字节数，防止异常的上游响应占满内存
+MAX_RESPONSE_SIZE = 8 * 1024 * 1024
+# 并发下载图片的最大数量
+MAX_IMAGE_DOWNLOADS = 8
+
+# 标签转为 URL 路径: 半角/全角空格转为 "+"，全角逗号转为半角逗号 (多标签分隔符)
+_TAG_TRANSLATE = str.maketrans({" ": "+", "\u3000": "+", "，": ","})
+
+# 提取标签时最多扫描的 HTML 开头字节数
+HTML_HEAD_SCAN_LIMIT = 32768
+
+# 从重定向后的 HTML 页面中提取标签名
+_TITLE_RE = re.compile(rb'<title>([^-]+)\s*-\s*Zerochan')
+_CANONICAL_RE = re.compile(rb'<link[^>]*rel="canonical"[^>]*href="[^"]*/([^"/]+)"')
 
 # 中文名到英文名的映射
-CHINESE_TO_ENGLISH = {
+CHINESE_TO_ENGLISH: Mapping[str, str] = MappingProxyType({
     # 原神角色
     "宵宫": "Yoimiya",
     "荧": "Lumine",
@@ -98,24 +131,15 @@ CHINESE_TO_ENGLISH = {
     "多莉": "Dori",
     "坎蒂丝": "Candace",
     "莱依拉": "Layla",
-    "流浪者": "Wanderer",
-    "瑶瑶": "Yaoyao",
-    "艾莉丝": "Alhaitham",
+    "艾莉丝": "Alice",
     "米卡": "Mika",
-    "卡维": "Kaveh",
     "绮良良": "Kirara",
     "珐露珊": "Faruzan",
-    "瑶瑶": "Yaoyao",
     "闲云": "Xianyun",
     "嘉明": "Gaming",
     "夏沃蕾": "Chevreuse",
     "夏洛蒂": "Charlotte",
-    "娜维娅": "Navia",
-    "芙宁娜": "Furina",
-    "那维莱特": "Neuvillette",
-    "莱欧斯利": "Wriothesley",
     "希格雯": "Sigewinne",
-    "克洛琳德": "Clorinde",
     "赛索斯": "Sethos",
     "艾梅莉埃": "Emilie",
     "基尼奇": "Kinich",
@@ -143,130 +167,358 @@ CHINESE_TO_ENGLISH = {
     "崩坏星穹铁道": "Honkai: Star Rail",
     "星穹铁道": "Honkai: Star Rail",
     "崩坏": "Honkai",
+})
+
+
+# 常见角色名变体 (键为英文名，导入时统一 casefold)
+_RAW_COMMON_VARIANTS = {
+    "furina": ("Furina", "Furina de Fontaine", "Focalors"),
+    "lumine": ("Lumine", "Traveler (Female)", "Female Traveler"),
+    "aether": ("Aether", "Traveler (Male)", "Male Traveler"),
+    "nahida": ("Nahida", "Lesser Lord Kusanali"),
+    "raiden shogun": ("Raiden Shogun", "Raiden Ei", "Ei", "Baal"),
+    "hu tao": ("Hu Tao", "Hutao"),
+    "ganyu": ("Ganyu",),
+    "keqing": ("Keqing",),
+    "mona": ("Mona", "Mona Megistus"),
+    "venti": ("Venti", "Barbatos"),
+    "zhongli": ("Zhongli", "Rex Lapis"),
+    "xiao": ("Xiao", "Alatus"),
+    "kazuha": ("Kazuha", "Kaedehara Kazuha"),
+    "scaramouche": ("Scaramouche", "Wanderer", "Kunikuzushi"),
+    "yae miko": ("Yae Miko", "Guuji Yae"),
+    "yoimiya": ("Yoimiya",),
+    "ayaka": ("Ayaka", "Kamisato Ayaka"),
+    "ayato": ("Ayato", "Kamisato Ayato"),
+    "itto": ("Itto", "Arataki Itto"),
+    "gorou": ("Gorou",),
+    "kokomi": ("Kokomi", "Sangonomiya Kokomi"),
+    "arlecchino": ("Arlecchino", "The Knave"),
+    "clorinde": ("Clorinde",),
+    "navia": ("Navia",),
+    "neuvillette": ("Neuvillette",),
+    "wriothesley": ("Wriothesley",),
+    "lyney": ("Lyney",),
+    "lynette": ("Lynette",),
+    "freminet": ("Freminet",),
+    "nilou": ("Nilou",),
+    "cyno": ("Cyno",),
+    "tighnari": ("Tighnari",),
+    "dehya": ("Dehya",),
+    "alhaitham": ("Alhaitham",),
+    "kaveh": ("Kaveh",),
+    "baizhu": ("Baizhu",),
+    "yaoyao": ("Yaoyao",),
+    "genshin impact": ("Genshin Impact", "Genshin"),
+    "hatsune miku": ("Hatsune Miku", "Miku"),
 }
 
+# 驻留字符串，使查表和缓存命中时复用同一对象与其缓存的哈希值
+_COMMON_VARIANTS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    sys.intern(key.casefold()): tuple(sys.intern(v) for v in values)
+    for key, values in _RAW_COMMON_VARIANTS.items()
+})
+
+# 已知的完整标签名，用户直接输入这些标签时无需再生成变体；
+# 本身也是变体表键的简称 (如 "Kazuha") 不算在内，以保留其后备变体
+_CANONICAL_TAGS = frozenset(
+    v for vs in _COMMON_VARIANTS.values() for v in vs if v.casefold() not in _COMMON_VARIANTS
+)
+
+
+@lru_cache(maxsize=256)
+def _tag_url(base_url: str, tag: str) -> URL:
+    """构建标签搜索 URL，结果会被缓存；返回已解析的 URL 对象，aiohttp 无需再次解析"""
+    return URL(f"{base_url}/{tag.translate(_TAG_TRANSLATE)}")
+
+
+# 条目中可能包含图片 URL 的字段，按优先级排列
+_IMAGE_FIELDS = ("image", "thumbnail", "src", "url")
+
+
+def _iter_image_urls(items: List[Dict[str, Any]]) -> Iterator[str]:
+    """依次产出每个条目的图片 URL，跳过没有图片字段的条目"""
+    for item in items:
+        for field in _IMAGE_FIELDS:
+            image_url = item.get(field)
+            if image_url:
+                yield image_url
+                break
+
+
+# 搜索参数的合法取值
+_SORT_OPTIONS = frozenset(("id", "fav"))
+_DIMENSION_OPTIONS = frozenset(("large", "huge", "landscape", "portrait", "square"))
+_TIME_SORT_OPTIONS = frozenset((0, 1, 2))
+
+
+def _build_params(
+    page: Optional[int],
+    limit: Optional[int],
+    sort: Optional[str],
+    strict: bool,
+    dimensions: Optional[str],
+    color: Optional[str],
+    time_sort: Optional[int],
+) -> Dict[str, Any]:
+    """构建搜索请求参数，忽略不合法的取值"""
+    params = {"json": ""}
+    if page:
+        params["p"] = page
+    if 1 <= (limit or 0) <= 250:
+        params["l"] = limit
+    if sort in _SORT_OPTIONS:
+        params["s"] = sort
+    if strict:
+        params["strict"] = ""
+    if dimensions in _DIMENSION_OPTIONS:
+        params["d"] = dimensions
+    if color:
+        params["c"] = color
+    if time_sort in _TIME_SORT_OPTIONS:
+        params["t"] = time_sort
+    return params
+
 
 class ZerochanAPI:
     """Zerochan API 客户端"""
 
     def __init__(self, username: str = "AstrBotUser"):
         self.base_url = ZEROCHAN_API_BASE
+        self._base = URL(self.base_url)
         self.user_agent = f"{USER_AGENT} - {username}"
         self.headers = {"User-Agent": self.user_agent}
         self.cookies = {"z_lang": "en"}
-
-    async def _request(self, url: str, params: dict = None) -> Optional[Dict[str, Any]]:
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 结果缓存: key -> (过期时间, 结果)
+        self._cache: "OrderedDict[tuple, Tuple[float, Any]]" = OrderedDict()
+        self._cache_max = 256
+        self._cache_ttl = 300.0
+        # 404 缓存: key -> 过期时间；与结果缓存分开，避免错误标签挤掉正常结果
+        self._not_found: "OrderedDict[tuple, float]" = OrderedDict()
+        self._not_found_max = 256
+        self._not_found_ttl = 300.0
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的 HTTP 会话，复用连接池与 Cookie"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                cookies=self.cookies,
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=aiohttp.TCPConnector(
+                    limit=32, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=75
+                ),
+                read_bufsize=2**17,
+                max_line_size=2**18,
+                max_field_size=2**18,
+            )
+        return self._session
+
+    async def close(self):
+        """关闭共享的 HTTP 会话"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @staticmethod
+    async def _read_limited(response: aiohttp.ClientResponse) -> Optional[bytes]:
+        """读取响应体，超过 MAX_RESPONSE_SIZE 时放弃并返回 None"""
+        if (response.content_length or 0) > MAX_RESPONSE_SIZE:
+            return None
+        # 未声明长度时边读边计数，超出上限立即中止
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(2**16):
+            size += len(chunk)
+            if size > MAX_RESPONSE_SIZE:
+                return None
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _cache_get(self, key: tuple) -> Optional[Any]:
+        """读取缓存，过期条目会被移除"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() > expires_at:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return value
+
+    def _cache_put(self, key: tuple, value: Any):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        self._cache[key] = (time.monotonic() + self._cache_ttl, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_max:
+            self._cache.popitem(last=False)
+
+    def _is_not_found(self, key: tuple) -> bool:
+        """检查请求近期是否返回过 404，过期条目会被移除"""
+        expires_at = self._not_found.get(key)
+        if expires_at is None:
+            return False
+        if time.monotonic() > expires_at:
+            del self._not_found[key]
+            return False
+        return True
+
+    def _mark_not_found(self, key: tuple):
+        """记录返回 404 的请求，超出容量时淘汰最早的条目"""
+        self._not_found[key] = time.monotonic() + self._not_found_ttl
+        self._not_found.move_to_end(key)
+        while len(self._not_found) > self._not_found_max:
+            self._not_found.popitem(last=False)
+
+    async def _request(self, url: Union[str, URL], params: dict = None) -> Optional[Dict[str, Any]]:
         """发送 API 请求"""
+        # 近期返回过 404 的请求直接视为未找到
+        not_found_key = (str(url), tuple(sorted(params.items())) if params else ())
+        if self._is_not_found(not_found_key):
+            logger.debug("Zerochan API: 命中 404 缓存 - %s", url)
+            return None
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url, params=params, headers=self.headers, cookies=self.cookies,
-                    timeout=aiohttp.ClientTimeout(total=30), allow_redirects=True
-                ) as response:
-                    if response.status == 200:
-                        text = await response.text()
-                        # 尝试解析 JSON
-                        try:
-                            data = json.loads(text)
-                            return {"data": data, "final_url": str(response.url)}
-                        except json.JSONDecodeError:
-                            # 不是 JSON，可能是重定向到了正确的标签页
-                            correct_tag = self._extract_tag_from_html(text)
-                            if correct_tag:
-                                logger.info(f"Zerochan API: 检测到重定向，正确标签为 '{correct_tag}'")
-                                return {"redirect_tag": correct_tag}
-                            logger.warning("Zerochan API: 响应不是 JSON 格式")
-                            return None
-                    elif response.status == 404:
-                        logger.warning(f"Zerochan API: 资源未找到 - {url}")
+            session = await self._get_session()
+            async with session.get(url, params=params, allow_redirects=True) as response:
+                if response.status == 200:
+                    body = await self._read_limited(response)
+                    if body is None:
+                        logger.warning(f"Zerochan API: 响应超过 {MAX_RESPONSE_SIZE} 字节 - {url}")
                         return None
-                    else:
-                        logger.warning(f"Zerochan API: 请求失败 - 状态码 {response.status}")
+                    # 尝试解析 JSON
+                    try:
+                        data = _json_loads(body)
+                        return {"data": data, "final_url": str(response.url)}
+                    except ValueError:
+                        # 不是 JSON (标准库解析非 UTF-8 字节时抛出 UnicodeDecodeError，
+                        # 同属 ValueError)，可能是重定向到了正确的标签页
+                        correct_tag = self._extract_tag_from_html(body, response.charset or "utf-8")
+                        if correct_tag:
+                            logger.info("Zerochan API: 检测到重定向，正确标签为 '%s'", correct_tag)
+                            return {"redirect_tag": correct_tag}
+                        logger.warning("Zerochan API: 响应不是 JSON 格式")
                         return None
+                elif response.status == 404:
+                    logger.warning(f"Zerochan API: 资源未找到 - {url}")
+                    self._mark_not_found(not_found_key)
+                    return None
+                else:
+                    logger.warning(f"Zerochan API: 请求失败 - 状态码 {response.status}")
+                    return None
+        # 响应体解析失败已在上方按非 JSON 处理，这里只兜底网络错误与超时
         except aiohttp.ClientError as e:
             logger.error(f"Zerochan API 请求错误: {e}")
             return None
-        except Exception as e:
-            logger.error(f"Zerochan API 未知错误: {e}")
+        except asyncio.TimeoutError:
+            logger.error(f"Zerochan API 请求超时 - {url}")
             return None
 
-    def _extract_tag_from_html(self, html: str) -> Optional[str]:
-        """从 HTML 页面中提取正确的标签名"""
-        title_match = re.search(r'<title>([^-]+)\s*-\s*Zerochan', html)
-        if title_match:
-            return title_match.group(1).strip()
+    async def _fetch_one(self, url: str, semaphore: asyncio.Semaphore) -> Optional[bytes]:
+        """下载单张图片，失败时返回 None"""
+        async with semaphore:
+            try:
+                session = await self._get_session()
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        blob = await self._read_limited(response)
+                        if blob is None:
+                            logger.warning(f"Zerochan 图片超过 {MAX_RESPONSE_SIZE} 字节，改为发送链接: {url}")
+                        return blob
+                    logger.warning(f"Zerochan 图片下载失败 - 状态码 {response.status}: {url}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Zerochan 图片下载错误: {e}")
+        return None
 
-        canonical_match = re.search(r'<link[^>]*rel="canonical"[^>]*href="[^"]*/([^"/]+)"', html)
-        if canonical_match:
-            return canonical_match.group(1).replace("+", " ")
+    async def fetch_images(self, urls: List[str]) -> List[Optional[bytes]]:
+        """并发下载多张图片，结果顺序与 urls 一致"""
+        semaphore = asyncio.Semaphore(MAX_IMAGE_DOWNLOADS)
+        return await asyncio.gather(*(self._fetch_one(url, semaphore) for url in urls))
+
+    def _extract_tag_from_html(self, html: bytes, encoding: str = "utf-8") -> Optional[str]:
+        """从 HTML 页面 (原始字节) 中提取正确的标签名，按响应的字符集解码"""
+        # <title> 与 canonical 链接都位于 <head> 中，只扫描这一段；
+        # 找不到 </head> 时也只扫描开头部分
+        head_end = html.find(b"</head>", 0, HTML_HEAD_SCAN_LIMIT)
+        html = html[:head_end] if head_end >= 0 else html[:HTML_HEAD_SCAN_LIMIT]
+
+        name = self._find_title_tag(html)
+        if name is None:
+            name = self._find_canonical_tag(html)
+
+        # 快速查找失败时回退到正则匹配
+        if name is None:
+            title_match = _TITLE_RE.search(html)
+            if title_match:
+                name = title_match.group(1).strip()
+        if name is None:
+            canonical_match = _CANONICAL_RE.search(html)
+            if canonical_match:
+                name = canonical_match.group(1).replace(b"+", b" ")
+
+        if not name:
+            return None
+        try:
+            tag = name.decode(encoding, errors="replace")
+        except LookupError:
+            tag = name.decode("utf-8", errors="replace")
+        # 解码出现替换字符说明字符集不匹配，不要用错误的标签继续请求
+        if "\ufffd" in tag:
+            return None
+        return tag
 
+    @staticmethod
+    def _find_title_tag(html: bytes) -> Optional[bytes]:
+        """用字节查找从 <title>标签 - Zerochan</title> 中取出标签名"""
+        start = html.find(b"<title>")
+        if start < 0:
+            return None
+        start += len(b"<title>")
+        end = html.find(b"</title>", start)
+        if end < 0:
+            return None
+        name, sep, rest = html[start:end].partition(b"-")
+        if sep and rest.lstrip().startswith(b"Zerochan"):
+            return name.strip() or None
         return None
 
-    def _translate_chinese(self, tag: str) -> str:
-        """将中文标签翻译为英文"""
-        return CHINESE_TO_ENGLISH.get(tag, tag)
+    @staticmethod
+    def _find_canonical_tag(html: bytes) -> Optional[bytes]:
+        """用字节查找从 <link rel="canonical" href="..."> 中取出标签名"""
+        rel = html.find(b'rel="canonical"')
+        if rel < 0:
+            return None
+        link_start = html.rfind(b"<link", 0, rel)
+        link_end = html.find(b">", rel)
+        if link_start < 0 or link_end < 0:
+            return None
+        link = html[link_start:link_end]
+        href = link.find(b'href="')
+        if href < 0:
+            return None
+        href += len(b'href="')
+        href_end = link.find(b'"', href)
+        if href_end < 0:
+            return None
+        _, slash, name = link[href:href_end].rpartition(b"/")
+        if slash and name:
+            return name.replace(b"+", b" ")
+        return None
 
-    def _generate_tag_variants(self, tag: str) -> List[str]:
-        """生成标签变体列表"""
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _generate_tag_variants(tag: str) -> Tuple[str, ...]:
+        """生成标签变体，结果会被缓存"""
         # 先尝试中文翻译
-        translated = self._translate_chinese(tag)
-        variants = [translated] if translated != tag else [tag]
-
-        # 常见角色名变体
-        common_variants = {
-            "furina": ["Furina", "Furina de Fontaine", "Focalors"],
-            "lumine": ["Lumine", "Traveler (Female)", "Female Traveler"],
-            "aether": ["Aether", "Traveler (Male)", "Male Traveler"],
-            "nahida": ["Nahida", "Lesser Lord Kusanali"],
-            "raiden shogun": ["Raiden Shogun", "Raiden Ei", "Ei", "Baal"],
-            "hu tao": ["Hu Tao", "Hutao"],
-            "ganyu": ["Ganyu"],
-            "keqing": ["Keqing"],
-            "mona": ["Mona", "Mona Megistus"],
-            "venti": ["Venti", "Barbatos"],
-            "zhongli": ["Zhongli", "Rex Lapis"],
-            "xiao": ["Xiao", "Alatus"],
-            "kazuha": ["Kazuha", "Kaedehara Kazuha"],
-            "scaramouche": ["Scaramouche", "Wanderer", "Kunikuzushi"],
-            "yae miko": ["Yae Miko", "Guuji Yae"],
-            "yoimiya": ["Yoimiya"],
-            "ayaka": ["Ayaka", "Kamisato Ayaka"],
-            "ayato": ["Ayato", "Kamisato Ayato"],
-            "itto": ["Itto", "Arataki Itto"],
-            "gorou": ["Gorou"],
-            "kokomi": ["Kokomi", "Sangonomiya Kokomi"],
-            "arlecchino": ["Arlecchino", "The Knave"],
-            "clorinde": ["Clorinde"],
-            "navia": ["Navia"],
-            "neuvillette": ["Neuvillette"],
-            "wriothesley": ["Wriothesley"],
-            "lyney": ["Lyney"],
-            "lynette": ["Lynette"],
-            "freminet": ["Freminet"],
-            "nilou": ["Nilou"],
-            "cyno": ["Cyno"],
-            "tighnari": ["Tighnari"],
-            "dehya": ["Dehya"],
-            "alhaitham": ["Alhaitham"],
-            "kaveh": ["Kaveh"],
-            "baizhu": ["Baizhu"],
-            "yaoyao": ["Yaoyao"],
-            "genshin impact": ["Genshin Impact", "Genshin"],
-            "hatsune miku": ["Hatsune Miku", "Miku"],
-        }
+        tag = tag.strip()
+        translated = CHINESE_TO_ENGLISH.get(tag, tag)
 
-        tag_lower = translated.lower()
-        if tag_lower in common_variants:
-            for variant in common_variants[tag_lower]:
-                if variant not in variants:
-                    variants.append(variant)
-
-        # 首字母大写
-        capitalized = translated.title()
-        if capitalized not in variants:
-            variants.append(capitalized)
-
-        return variants
+        # 常见角色名变体，最后补充首字母大写形式；dict.fromkeys 按顺序去重
+        extra = _COMMON_VARIANTS.get(translated.casefold(), ())
+        candidates = (translated, *extra, translated.title())
+        return tuple(dict.fromkeys(v for v in candidates if v))
 
     async def search(
         self,
@@ -280,64 +532,126 @@ class ZerochanAPI:
         time_sort: int = None,
     ) -> Optional[Dict[str, Any]]:
         """搜索图片"""
-        # 生成标签变体
-        tag_variants = self._generate_tag_variants(tags)
-        tried_tags = []
+        tags = tags.strip()
+
+        # 生成标签变体；严格模式或已是标准标签名时只请求一次
+        if strict or tags in _CANONICAL_TAGS:
+            tag_variants = (CHINESE_TO_ENGLISH.get(tags, tags),)
+        else:
+            tag_variants = self._generate_tag_variants(tags)
 
+        # 去掉 URL 路径相同的变体 (例如全角空格与半角空格)
+        unique_variants = {}
         for tag in tag_variants:
-            tried_tags.append(tag)
-
-            # 构建URL
-            tag_path = tag.replace(" ", "+")
-            url = f"{self.base_url}/{tag_path}"
-
-            # 构建参数
-            params = {"json": ""}
-
-            if page:
-                params["p"] = page
-            if limit and 1 <= limit <= 250:
-                params["l"] = limit
-            if sort and sort in ("id", "fav"):
-                params["s"] = sort
-            if strict:
-                params["strict"] = ""
-            if dimensions and dimensions in ("large", "huge", "landscape", "portrait", "square"):
-                params["d"] = dimensions
-            if color:
-                params["c"] = color
-            if time_sort is not None and time_sort in (0, 1, 2):
-                params["t"] = time_sort
-
-            result = await self._request(url, params)
-
-            if result is None:
-                continue
-
-            # 如果检测到重定向，尝试使用正确的标签
-            if "redirect_tag" in result:
-                correct_tag = result["redirect_tag"]
-                if correct_tag and correct_tag not in tried_tags:
-                    logger.info(f"Zerochan API: 尝试使用重定向标签 '{correct_tag}'")
-                    correct_tag_path = correct_tag.replace(" ", "+")
-                    correct_url = f"{self.base_url}/{correct_tag_path}"
-                    result = await self._request(correct_url, params)
+            unique_variants.setdefault(_tag_url(self.base_url, tag), tag)
+        tag_variants = tuple(unique_variants.values())[:MAX_TAG_VARIANTS]
+
+        # 构建参数
+        params = _build_params(page, limit, sort, strict, dimensions, color, time_sort)
+
+        # 以变体和规范化后的参数为缓存键，中文名、别名等不同写法可共享缓存
+        cache_key = ("s", tag_variants, tuple(sorted(params.items())))
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = await self._search(tag_variants, params)
+        if result is not None:
+            self._cache_put(cache_key, result)
+        return result
+
+    async def _search(self, tag_variants: Tuple[str, ...], params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """并发请求各个标签变体，执行实际的搜索"""
+        # 只有一个变体时无需并发调度
+        if len(tag_variants) == 1:
+            return await self._search_one(tag_variants[0], params)
+
+        # 并发尝试所有标签变体，按变体顺序取排名最靠前的命中结果
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+        tried_urls = {_tag_url(self.base_url, tag) for tag in tag_variants}
+        # 任务 -> 对应变体的排名；重定向请求沿用原变体的排名
+        ranks = {
+            asyncio.create_task(self._probe_tag(tag, params, semaphore)): rank
+            for rank, tag in enumerate(tag_variants)
+        }
+        pending = set(ranks)
+        unresolved = set(ranks.values())
+        hits = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    rank = ranks.pop(task)
+                    tag, result, is_redirect = task.result()
+
                     if result and "data" in result:
-                        result["used_tag"] = correct_tag
-                        return result
-                continue
+                        result["used_tag"] = tag
+                        hits[rank] = result
+                        unresolved.discard(rank)
+                        continue
+
+                    # 如果检测到重定向，追加一个正确标签的请求；与 _search_one 一致，最多跟随一层
+                    correct_tag = result.get("redirect_tag") if result else None
+                    if correct_tag and not is_redirect:
+                        correct_url = _tag_url(self.base_url, correct_tag)
+                        if correct_url not in tried_urls:
+                            tried_urls.add(correct_url)
+                            logger.info("Zerochan API: 尝试使用重定向标签 '%s'", correct_tag)
+                            follow = asyncio.create_task(self._probe_tag(correct_tag, params, semaphore, True))
+                            ranks[follow] = rank
+                            pending.add(follow)
+                            continue
+
+                    unresolved.discard(rank)
+
+                # 排名更靠前的变体都已确认未命中时才返回
+                if hits:
+                    best = min(hits)
+                    if not unresolved or min(unresolved) > best:
+                        return hits[best]
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return None
+
+    async def _search_one(self, tag: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """请求单个标签，必要时跟随一次重定向"""
+        result = await self._request(_tag_url(self.base_url, tag), params)
+        if result is None:
+            return None
 
-            if "data" in result:
-                result["used_tag"] = tag
-                return result
+        # 如果检测到重定向，尝试使用正确的标签
+        correct_tag = result.get("redirect_tag")
+        if correct_tag and _tag_url(self.base_url, correct_tag) != _tag_url(self.base_url, tag):
+            logger.info("Zerochan API: 尝试使用重定向标签 '%s'", correct_tag)
+            tag = correct_tag
+            result = await self._request(_tag_url(self.base_url, tag), params)
 
+        if result and "data" in result:
+            result["used_tag"] = tag
+            return result
         return None
 
+    async def _probe_tag(
+        self, tag: str, params: dict, semaphore: asyncio.Semaphore, is_redirect: bool = False
+    ) -> Tuple[str, Optional[Dict[str, Any]], bool]:
+        """请求单个标签，返回 (标签, 结果, 是否为重定向后的请求)"""
+        url = _tag_url(self.base_url, tag)
+        async with semaphore:
+            return tag, await self._request(url, params), is_redirect
+
     async def get_entry(self, entry_id: int) -> Optional[Dict[str, Any]]:
         """获取单个条目详情"""
-        url = f"{self.base_url}/{entry_id}"
+        cache_key = ("e", entry_id)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        url = self._base / str(entry_id)
         result = await self._request(url, {"json": ""})
         if result and "data" in result:
+            self._cache_put(cache_key, result["data"])
             return result["data"]
         return None
 
@@ -346,8 +660,9 @@ class ZerochanAPI:
 class ZerochanPlugin(Star):
     """Zerochan 图片搜索插件"""
 
-    def __init__(self, context: Context):
+    def __init__(self, context: Context, config: Optional[AstrBotConfig] = None):
         super().__init__(context)
+        self.config = config or {}
         self.api = ZerochanAPI()
 
     async def initialize(self):
@@ -389,12 +704,11 @@ class ZerochanPlugin(Star):
 
         if len(parts) >= 4:
             try:
-                limit = int(parts[3])
-                limit = min(limit, 10)
+                limit = max(1, min(int(parts[3]), 10))
             except ValueError:
                 pass
 
-        logger.info(f"搜索 Zerochan: 标签={tags}, 页码={page}, 数量={limit}")
+        logger.info("搜索 Zerochan: 标签=%s, 页码=%s, 数量=%s", tags, page, limit)
 
         # 调用 API
         result = await self.api.search(tags=tags, page=page, limit=limit, sort="fav")
@@ -408,7 +722,7 @@ class ZerochanPlugin(Star):
         used_tag = result.get("used_tag", tags)
 
         # 打印调试信息
-        logger.debug(f"API 返回数据: {data}")
+        logger.debug("API 返回数据: %s", data)
 
         # 检查数据结构
         items = []
@@ -433,27 +747,22 @@ class ZerochanPlugin(Star):
         reply = f"搜索 '{used_tag}' 找到 {total} 张图片，显示第 {page} 页:\n"
 
         # 发送图片
-        image_urls = []
-        for item in items[:limit]:
-            # 尝试多种可能的图片字段
-            image_url = None
-            for field in ["image", "thumbnail", "src", "url"]:
-                if item.get(field):
-                    image_url = item.get(field)
-                    break
-
-            if image_url:
-                image_urls.append(image_url)
-                logger.debug(f"获取到图片URL: {image_url}")
+        image_urls = list(islice(_iter_image_urls(items), limit))
+        logger.debug("获取到图片URL: %s", image_urls)
 
         if image_urls:
-            # 随机选择一张图片发送
-            selected_url = random.choice(image_urls)
-            # 使用消息链发送图文
-            yield event.chain_result([
-                Plain(text=reply.rstrip()),
-                Image.fromURL(selected_url)
-            ])
+            # 使用一条消息链发送文字和全部图片
+            chain = [Plain(text=reply.rstrip())]
+            if self.config.get("prefetch_images", False):
+                # 平台需要图片数据时并发预取，下载失败的图片回退为 URL
+                blobs = await self.api.fetch_images(image_urls)
+                chain.extend(
+                    Image.fromBytes(blob) if blob else Image.fromURL(url)
+                    for url, blob in zip(image_urls, blobs)
+                )
+            else:
+                chain.extend(Image.fromURL(url) for url in image_urls)
+            yield event.chain_result(chain)
         else:
             yield event.plain_result(reply + "无法获取图片链接")
 
@@ -465,7 +774,7 @@ class ZerochanPlugin(Star):
         示例: /zcid 3793685
         """
         message_str = event.message_str.strip()
-        parts = message_str.split()
+        parts = message_str.split(maxsplit=1)
 
         if len(parts) < 2:
             yield event.plain_result(
@@ -476,12 +785,13 @@ class ZerochanPlugin(Star):
             return
 
         try:
-            entry_id = int(parts[1])
+            # 只取第一个参数，忽略其后多余的内容
+            entry_id = int(parts[1].split(maxsplit=1)[0])
         except ValueError:
             yield event.plain_result("请输入有效的数字ID。")
             return
 
-        logger.info(f"获取 Zerochan 图片详情: ID={entry_id}")
+        logger.info("获取 Zerochan 图片详情: ID=%s", entry_id)
 
         result = await self.api.get_entry(entry_id)
 
@@ -493,12 +803,7 @@ class ZerochanPlugin(Star):
         if isinstance(result, list) and len(result) > 0:
             result = result[0]
 
-        # 尝试多种可能的图片字段
-        image_url = None
-        for field in ["image", "thumbnail", "src", "url"]:
-            if result.get(field):
-                image_url = result.get(field)
-                break
+        image_url = next(_iter_image_urls([result]), None)
 
         width = result.get("width", "未知")
         height = result.get("height", "未知")
@@ -521,7 +826,7 @@ class ZerochanPlugin(Star):
                 tags_str += f" ...共{len(tags_list)}个标签"
             reply += f"标签: {tags_str}\n"
 
-        logger.debug(f"图片详情: image_url={image_url}")
+        logger.debug("图片详情: image_url=%s", image_url)
 
         if image_url:
             # 使用消息链发送图文
@@ -559,4 +864,5 @@ class ZerochanPlugin(Star):
 
     async def terminate(self):
         """插件销毁"""
+        await self.api.close()
         logger.info("Zerochan 插件已卸载")